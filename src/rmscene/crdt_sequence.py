@@ -5,10 +5,9 @@
 import logging
 import typing as tp
 from typing import Iterable
-from collections import defaultdict
 from dataclasses import dataclass
 
-from .tagged_block_common import CrdtId
+from .tagged_block_common import CrdtId, _crdt_id
 
 _logger = logging.getLogger(__name__)
 
@@ -19,7 +18,7 @@ _logger = logging.getLogger(__name__)
 _T = tp.TypeVar("_T", covariant=True)
 
 
-@dataclass
+@dataclass(slots=True)
 class CrdtSequenceItem(tp.Generic[_T]):
     item_id: CrdtId
     left_id: CrdtId
@@ -61,7 +60,7 @@ class CrdtSequence(tp.Generic[_Ti]):
 
     def __iter__(self) -> tp.Iterator[CrdtId]:
         """Return ids in order"""
-        yield from toposort_items(self._items.values())
+        yield from toposort_items(self._items.values(), self._items)
 
     def keys(self) -> list[CrdtId]:
         """Return CrdtIds in order."""
@@ -93,56 +92,68 @@ class CrdtSequence(tp.Generic[_Ti]):
         self._items[item.item_id] = item
 
 
-END_MARKER = CrdtId(0, 0)
+# Ids read from files are interned, so this can usually be checked by identity.
+END_MARKER = _crdt_id(0, 0)
 
 
-def toposort_items(items: Iterable[CrdtSequenceItem]) -> Iterable[CrdtId]:
+def toposort_items(
+    items: Iterable[CrdtSequenceItem],
+    item_dict: tp.Optional[dict[CrdtId, CrdtSequenceItem]] = None,
+) -> Iterable[CrdtId]:
     """Sort SequenceItems based on left and right ids.
 
     Returns `CrdtId`s in the sorted order.
 
+    If the caller already has the items indexed by id, this can be passed as
+    `item_dict` to avoid building it again; `items` is then ignored.
+
     """
 
-    item_dict = {}
-    for item in items:
-        item_dict[item.item_id] = item
+    if item_dict is None:
+        item_dict = {item.item_id: item for item in items}
     if not item_dict:
         return  # nothing to do
 
     def _side_id(item, side):
+        """Return the left/right id of `item`, or None if it is not a known item."""
         side_id = getattr(item, f"{side}_id")
-        if side_id == END_MARKER or side_id not in item_dict:
-            if side_id != END_MARKER:
-                _logger.debug("Ignoring unknown %s_id %s of %s", side, side_id, item)
-            return "__start" if side == "left" else "__end"
-        else:
-            return side_id
-
-    # build dictionary: key "comes after" values
-    data = defaultdict(set)
+        if side_id is END_MARKER or side_id == END_MARKER:
+            return None
+        if side_id not in item_dict:
+            _logger.debug("Ignoring unknown %s_id %s of %s", side, side_id, item)
+            return None
+        return side_id
+
+    # build graph: each key "comes before" the ids in its list. Duplicate
+    # edges are fine as long as they are counted consistently. Ids at the
+    # start/end (or unknown) impose no constraint, so only real items are
+    # ever queued below.
+    succ: dict[CrdtId, list[CrdtId]] = {k: [] for k in item_dict}
+    indeg: dict[CrdtId, int] = dict.fromkeys(item_dict, 0)
     for item in item_dict.values():
         left_id = _side_id(item, "left")
         right_id = _side_id(item, "right")
-        data[item.item_id].add(left_id)
-        data[right_id].add(item.item_id)
-
-    # fill in sources not explicitly included
-    sources_not_in_data = {dep for deps in data.values() for dep in deps} - {
-        k for k in data.keys()
-    }
-    data.update({k: set() for k in sources_not_in_data})
-
-    while True:
-        next_items = {item for item, deps in data.items() if not deps}
-        if next_items == {"__end"}:
-            break
-        assert next_items
-        yield from sorted(k for k in next_items if k in item_dict)
-        data = {
-            item: (deps - next_items)
-            for item, deps in data.items()
-            if item not in next_items
-        }
-
-    if data != {"__end": set()}:
+        if left_id is not None:
+            succ[left_id].append(item.item_id)
+            indeg[item.item_id] += 1
+        if right_id is not None:
+            succ[item.item_id].append(right_id)
+            indeg[right_id] += 1
+
+    # Kahn's algorithm, processing one "generation" of ready items at a time
+    # so that concurrent items are ordered by id.
+    ready = [k for k in item_dict if not indeg[k]]
+    while ready:
+        if len(ready) > 1:
+            ready.sort()
+        yield from ready
+        next_ready = []
+        for k in ready:
+            for v in succ[k]:
+                indeg[v] -= 1
+                if not indeg[v]:
+                    next_ready.append(v)
+        ready = next_ready
+
+    if any(indeg.values()):
         raise ValueError("cyclic dependency")
@@ -5,7 +5,7 @@ import logging
 import typing as tp
 from dataclasses import dataclass, field
 
-from .crdt_sequence import CrdtSequence
+from .crdt_sequence import CrdtSequence, END_MARKER
 from .tagged_block_common import CrdtId, LwwValue
 from .text import expand_text_items
 
@@ -121,7 +121,7 @@ class Pen(enum.IntEnum):
         return value in (cls.HIGHLIGHTER_1, cls.HIGHLIGHTER_2)
 
 
-@dataclass
+@dataclass(slots=True)
 class Point:
     x: float
     y: float
@@ -160,9 +160,6 @@ class ParagraphStyle(enum.IntEnum):
     CHECKBOX_CHECKED = 7
 
 
-END_MARKER = CrdtId(0, 0)
-
-
 @dataclass
 class Text(SceneItem):
     """Block of text.
@@ -192,7 +189,7 @@ class Text(SceneItem):
 ## Glyph range
 
 
-@dataclass
+@dataclass(slots=True)
 class Rectangle:
     x: float
     y: float
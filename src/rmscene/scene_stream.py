@@ -8,6 +8,7 @@ from __future__ import annotations
 
 import logging
 import math
+import struct
 import typing as tp
 from abc import ABC, abstractmethod
 from collections.abc import Iterable, Iterator
@@ -30,6 +31,9 @@ _logger = logging.getLogger(__name__)
 # Top-level block types
 ############################################################
 
+# Cache for `Block.lookup`: (class, block_type) -> matching subclass
+_block_lookup_cache: dict[tuple[type, int], type] = {}
+
 
 @dataclass
 class Block(ABC):
@@ -55,12 +59,22 @@ class Block(ABC):
 
     @classmethod
     def lookup(cls, block_type: int) -> tp.Optional[tp.Type[Block]]:
+        # This is called for every block read, so remember successful
+        # lookups. Misses are not cached, in case a matching subclass is
+        # defined later.
+        key = (cls, block_type)
+        if key in _block_lookup_cache:
+            return _block_lookup_cache[key]
         if getattr(cls, "BLOCK_TYPE", None) == block_type:
-            return cls
-        for subclass in cls.__subclasses__():
-            if match := subclass.lookup(block_type):
-                return match
-        return None
+            match = cls
+        else:
+            for subclass in cls.__subclasses__():
+                if match := subclass.lookup(block_type):
+                    break
+            else:
+                return None
+        _block_lookup_cache[key] = match
+        return match
 
     @classmethod
     def read(self, reader: TaggedBlockReader) -> Optional[Block]:
@@ -160,6 +174,11 @@ class SceneInfo(Block):
         writer.write_lww_bool(3, self.root_document_visible)
 
 
+# Contents of each author id subblock: UUID length (always 16, so a
+# single-byte varuint), UUID bytes and the author id
+_AUTHOR_ID_STRUCT = struct.Struct("<B16sH")
+
+
 @dataclass
 class AuthorIdsBlock(Block):
     BLOCK_TYPE: tp.ClassVar = 0x09
@@ -187,9 +206,9 @@ class AuthorIdsBlock(Block):
         writer.data.write_varuint(num_subblocks)
         for author_id, uuid in self.author_uuids.items():
             with writer.write_subblock(0):
-                writer.data.write_varuint(len(uuid.bytes_le))
-                writer.data.write_bytes(uuid.bytes_le)
-                writer.data.write_uint16(author_id)
+                writer.data.write_bytes(
+                    _AUTHOR_ID_STRUCT.pack(16, uuid.bytes_le, author_id)
+                )
 
 
 @dataclass
@@ -347,6 +366,13 @@ class SceneTreeBlock(Block):
             writer.write_id(1, self.parent_id)
 
 
+# Constant factors for writing version 1 points, folded so each point costs a
+# single multiply per field. These still round-trip exactly through float32.
+# Reading keeps the original expression, so parsed values are unchanged.
+_DIRECTION_TO_RADIANS = (2 * math.pi) / 255
+_INV_255 = 1 / 255
+
+
 def point_from_stream(stream: TaggedBlockReader, version: int = 2) -> si.Point:
     if version not in (1, 2):
         raise ValueError("Unknown version %s" % version)
@@ -390,9 +416,9 @@ def point_to_stream(point: si.Point, writer: TaggedBlockWriter, version: int = 2
     if version == 1:
         # calculation based on ddvk's reader
         d.write_float32(point.speed / 4)
-        d.write_float32(point.direction * (2 * math.pi) / 255)
+        d.write_float32(point.direction * _DIRECTION_TO_RADIANS)
         d.write_float32(point.width / 4)
-        d.write_float32(point.pressure / 255)
+        d.write_float32(point.pressure * _INV_255)
     else:
         d.write_uint16(point.speed)
         d.write_uint16(point.width)
@@ -465,17 +491,10 @@ class SceneItemBlock(Block):
 
         assert stream.current_block
         block_type = stream.current_block.block_type
-        if block_type == SceneGlyphItemBlock.BLOCK_TYPE:
-            subclass = SceneGlyphItemBlock
-        elif block_type == SceneGroupItemBlock.BLOCK_TYPE:
-            subclass = SceneGroupItemBlock
-        elif block_type == SceneLineItemBlock.BLOCK_TYPE:
-            subclass = SceneLineItemBlock
-        elif block_type == SceneTextItemBlock.BLOCK_TYPE:
-            subclass = SceneTextItemBlock
-        elif block_type == SceneTombstoneItemBlock.BLOCK_TYPE:
-            subclass = SceneTombstoneItemBlock
-        else:
+        # Look up from the base class, so any scene item type can be read
+        # whichever subclass this is called on
+        subclass = SceneItemBlock.lookup(block_type)
+        if subclass is None:
             raise ValueError(
                 "unknown scene type %d in %s" % (block_type, stream.current_block)
             )
@@ -849,10 +868,14 @@ def read_blocks(data: tp.BinaryIO) -> Iterator[Block]:
 
 
 def write_blocks(
-    data: tp.BinaryIO, blocks: Iterable[Block], options: tp.Optional[dict] = None
+    data: tp.BinaryIO | bytearray,
+    blocks: Iterable[Block],
+    options: tp.Optional[dict] = None,
 ):
     """
     Write blocks to file.
+
+    `data` may also be a `bytearray`, which the output is appended to.
     """
     if options is not None and "version" in options:
         options["version"] = Version(options["version"])
@@ -7,6 +7,7 @@ from __future__ import annotations
 from collections.abc import Iterator
 from contextlib import contextmanager
 from dataclasses import dataclass
+from functools import lru_cache
 from io import BytesIO
 import enum
 import logging
@@ -29,6 +30,17 @@ class TagType(enum.IntEnum):
     Byte1 = 0x1
 
 
+# TagType for each possible 4-bit value (None if not valid), so tags can be
+# decoded without constructing the enum each time.
+_TAG_TYPES: tuple[tp.Optional[TagType], ...] = tuple(
+    next((t for t in TagType if t.value == i), None) for i in range(0x10)
+)
+
+
+# Little-endian structs for the scalar types used by DataStream, compiled once
+_STRUCTS: dict[str, struct.Struct] = {c: struct.Struct("<" + c) for c in "?BHIfd"}
+
+
 class UnexpectedBlockError(Exception):
     """Unexpected tag or index in block stream."""
 
@@ -39,10 +51,70 @@ class CrdtId:
     part1: int
     part2: int
 
+    # Ids are used heavily as dict keys, so the hash is computed on first use
+    # and kept in a slot that is not a dataclass field.
+    __slots__ = ("part1", "part2", "_hash")
+
+    def __hash__(self) -> int:
+        try:
+            return self._hash
+        except AttributeError:
+            h = hash((self.part1, self.part2))
+            object.__setattr__(self, "_hash", h)
+            return h
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is CrdtId:
+            return self.part1 == other.part1 and self.part2 == other.part2
+        return NotImplemented
+
+    def __reduce__(self):
+        return (CrdtId, (self.part1, self.part2))
+
     def __repr__(self) -> str:
         return f"CrdtId({self.part1}, {self.part2})"
 
 
+@lru_cache(maxsize=1 << 16)
+def _crdt_id(part1: int, part2: int) -> CrdtId:
+    """Return a shared `CrdtId` instance for (part1, part2).
+
+    Ids are immutable, and the same ones recur many times (e.g. when text
+    items are expanded into characters), so reuse instances rather than
+    allocating new ones. The cache is bounded to avoid unbounded growth on
+    long documents.
+
+    """
+    return CrdtId(part1, part2)
+
+
+def _varuint_bytes(value: int) -> bytes:
+    """Encode `value` as a varuint."""
+    if value < 0:
+        raise ValueError("value is negative")
+    b = bytearray()
+    while True:
+        to_write = value & 0x7F
+        value >>= 7
+        if value:
+            b.append(to_write | 0x80)
+        else:
+            b.append(to_write)
+            break
+    return bytes(b)
+
+
+@lru_cache(maxsize=256)
+def _tag_bytes(index: int, tag_type: TagType) -> bytes:
+    """Return the encoded tag for (index, tag_type).
+
+    Only a handful of distinct tags occur in a file, and they are written over
+    and over, so each is encoded once.
+
+    """
+    return _varuint_bytes(index << 4 | int(tag_type))
+
+
 class DataStream:
     """Read basic values from a remarkable v6 file stream."""
 
@@ -129,20 +201,17 @@ class DataStream:
         index = x >> 4
 
         # Second part is a tag type that identifies what kind of data it is
-        tag_type = x & 0xF
-        try:
-            tag_type = TagType(tag_type)
-        except ValueError as e:
+        tag_type = _TAG_TYPES[x & 0xF]
+        if tag_type is None:
             raise ValueError(
-                "Bad tag type 0x%X at position %d" % (tag_type, self.data.tell())
+                "Bad tag type 0x%X at position %d" % (x & 0xF, self.data.tell())
             )
 
         return index, tag_type
 
     def write_tag(self, index: int, tag_type: TagType):
         """Write a tag to the stream."""
-        x = index << 4 | int(tag_type)
-        self.write_varuint(x)
+        self.data.write(_tag_bytes(index, tag_type))
 
     def read_bytes(self, n: int) -> bytes:
         "Read `n` bytes, raising `EOFError` if there are not enough."
@@ -156,13 +225,11 @@ class DataStream:
         self.data.write(b)
 
     def _read_struct(self, pattern: str):
-        pattern = "<" + pattern
-        n = struct.calcsize(pattern)
-        return struct.unpack(pattern, self.read_bytes(n))[0]
+        s = _STRUCTS[pattern]
+        return s.unpack(self.read_bytes(s.size))[0]
 
     def _write_struct(self, pattern: str, value):
-        pattern = "<" + pattern
-        self.data.write(struct.pack(pattern, value))
+        self.data.write(_STRUCTS[pattern].pack(value))
 
     def read_bool(self) -> bool:
         """Read a bool from the data stream."""
@@ -190,10 +257,14 @@ class DataStream:
 
     def read_varuint(self) -> int:
         """Read a varuint from the data stream."""
-        shift = 0
-        result = 0
+        i = self.read_bytes(1)[0]
+        if not (i & 0x80):
+            # Fast path: tags and most ids fit in a single byte
+            return i
+        shift = 7
+        result = i & 0x7F
         while True:
-            i = ord(self.read_bytes(1))
+            i = self.read_bytes(1)[0]
             result |= (i & 0x7F) << shift
             shift += 7
             if not (i & 0x80):
@@ -206,7 +277,7 @@ class DataStream:
         part1 = self.read_uint8()
         part2 = self.read_varuint()
         # result = (part1 << 48) | part2
-        return CrdtId(part1, part2)
+        return _crdt_id(part1, part2)
 
     def write_bool(self, value: bool):
         """Write a bool to the data stream."""
@@ -234,18 +305,11 @@ class DataStream:
 
     def write_varuint(self, value: int):
         """Write a varuint to the data stream."""
-        if value < 0:
-            raise ValueError("value is negative")
-        b = bytearray()
-        while True:
-            to_write = value & 0x7F
-            value >>= 7
-            if value:
-                b.append(to_write | 0x80)
-            else:
-                b.append(to_write)
-                break
-        self.data.write(b)
+        if 0 <= value < 0x80:
+            # Fast path: tags and most ids fit in a single byte
+            self.data.write(bytes((value,)))
+            return
+        self.data.write(_varuint_bytes(value))
 
     def write_crdt_id(self, value: CrdtId):
         """Write a `CrdtId` to the data stream."""
@@ -253,6 +317,9 @@ class DataStream:
         # TODO: should be var unit?
         if value.part1 >= 2**8 or value.part2 >= 2**64:
             raise ValueError("CrdtId too large: %s" % value)
+        if value.part2 < 0x80:
+            self.data.write(bytes((value.part1, value.part2)))
+            return
         self.write_uint8(value.part1)
         self.write_varuint(value.part2)
         # result = (part1 << 48) | part2
@@ -56,6 +56,8 @@ class TaggedBlockReader:
     """Read blocks and values from a remarkable v6 file stream."""
 
     def __init__(self, data: tp.BinaryIO):
+        if isinstance(data, bytearray):
+            raise TypeError("Cannot read from a bytearray, wrap it in io.BytesIO")
         rm_data = DataStream(data)
         self.data = rm_data
         self.current_block: tp.Optional[MainBlockInfo] = None
@@ -196,7 +198,12 @@ class TaggedBlockReader:
             current_version=current_version,
         )
 
-        yield self.current_block
+        try:
+            yield self.current_block
+        except Exception:
+            # Leave the reader usable after an error within the block
+            self.current_block = None
+            raise
 
         assert self.current_block is not None
         self._check_position(self.current_block)
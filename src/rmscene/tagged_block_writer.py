@@ -25,13 +25,27 @@ from .tagged_block_common import (
 _logger = logging.getLogger(__name__)
 
 
+class _BytearrayWriter:
+    """Write-only stream that appends to a bytearray."""
+
+    def __init__(self, buf: bytearray):
+        self.write = buf.extend
+
+
 class TaggedBlockWriter:
-    """Write blocks and values to a remarkable v6 file stream."""
+    """Write blocks and values to a remarkable v6 file stream.
+
+    `data` may also be a `bytearray`, which the output is appended to.
+    """
 
-    def __init__(self, data: tp.BinaryIO, options: tp.Optional[dict] = None):
+    def __init__(
+        self, data: tp.BinaryIO | bytearray, options: tp.Optional[dict] = None
+    ):
         if options is None:
             options = {}
         self.options = options
+        if isinstance(data, bytearray):
+            data = tp.cast(tp.BinaryIO, _BytearrayWriter(data))
         rm_data = DataStream(data)
         self.data = rm_data
         self._in_block: bool = False
@@ -101,9 +115,7 @@ class TaggedBlockWriter:
             yield
         finally:
             self.data = previous_data
-
-        assert self._in_block
-        self._in_block = False
+            self._in_block = False
 
         self.data.write_uint32(len(block_buf.getbuffer()))
         self.data.write_uint8(0)
@@ -117,8 +129,36 @@ class TaggedBlockWriter:
         """Write a subblock tag and length once the with-block has exited.
 
         Within this block, other writes are accumulated, so that the
-        whole block can be written out with its length at the end.
+        whole block can be written out with its length at the end. Inside
+        a top-level block, they go straight to the block buffer and the
+        length is filled in afterwards.
         """
+        if self._in_block:
+            # Writes are already going to our own block buffer, so write the
+            # contents in place and fill in the length afterwards.
+            buf = self.data.data
+            start = buf.tell()
+            self.data.write_tag(index, TagType.Length4)
+            length_pos = buf.tell()
+            self.data.write_uint32(0)
+            try:
+                yield
+            except BaseException:
+                # Discard the partial subblock, as if it was never started
+                buf.seek(start)
+                buf.truncate()
+                raise
+            end = buf.tell()
+            buf.seek(length_pos)
+            self.data.write_uint32(end - length_pos - 4)
+            buf.seek(end)
+            _logger.debug(
+                "Wrote subblock %d: %s",
+                index,
+                buf.getbuffer()[length_pos + 4 : end].hex(),
+            )
+            return
+
         previous_data = self.data
         subblock_buf = BytesIO()
         subblock_data = DataStream(subblock_buf)
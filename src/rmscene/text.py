@@ -11,7 +11,7 @@ import logging
 import typing as tp
 
 from . import scene_items as si
-from .tagged_block_common import CrdtId, LwwValue
+from .tagged_block_common import CrdtId, LwwValue, _crdt_id
 from .crdt_sequence import CrdtSequence, CrdtSequenceItem
 
 _logger = logging.getLogger(__name__)
@@ -35,7 +35,8 @@ def expand_text_item(
         assert item.value == ""
         chars = [""] * item.deleted_length
         deleted_length = 1
-    elif isinstance(item.value, int):
+    elif isinstance(item.value, int) or len(item.value) == 1:
+        # Formatting codes and single characters are already expanded
         yield item
         return
     else:
@@ -51,7 +52,7 @@ def expand_text_item(
     item_id = item.item_id
     left_id = item.left_id
     for c in chars[:-1]:
-        right_id = CrdtId(item_id.part1, item_id.part2 + 1)
+        right_id = _crdt_id(item_id.part1, item_id.part2 + 1)
         yield CrdtSequenceItem(item_id, left_id, right_id, deleted_length, c)
         left_id = item_id
         item_id = right_id
@@ -66,6 +67,16 @@ def expand_text_items(
         yield from expand_text_item(item)
 
 
+# Every combination of inline formatting properties. One instance of each is
+# used while walking the text, so a change of formatting is an identity check;
+# each `CrdtStr` gets its own copy.
+_PROPERTIES = {
+    (weight, style): {"font-weight": weight, "font-style": style}
+    for weight in ("normal", "bold")
+    for style in ("normal", "italic")
+}
+
+
 @dataclass
 class CrdtStr:
     """String with CrdtIds for chars and optional properties.
@@ -115,54 +126,61 @@ class TextDocument:
 
         # Expand from strings to characters
         char_items = CrdtSequence(expand_text_items(text.items.sequence_items()))
-        keys = list(char_items)
-        properties = {"font-weight": "normal", "font-style": "normal"}
+        properties = _PROPERTIES["normal", "normal"]
 
         def handle_formatting_code(code):
+            nonlocal properties
+            weight = properties["font-weight"]
+            style = properties["font-style"]
             if code == 1:
-                properties["font-weight"] = "bold"
+                weight = "bold"
             elif code == 2:
-                properties["font-weight"] = "normal"
+                weight = "normal"
             if code == 3:
-                properties["font-style"] = "italic"
+                style = "italic"
             elif code == 4:
-                properties["font-style"] = "normal"
+                style = "normal"
             else:
                 _logger.warning("Unknown formatting code in text: %d", code)
+            properties = _PROPERTIES[weight, style]
             return properties
 
-        def parse_paragraph_contents():
-            if keys and char_items[keys[0]] == "\n":
-                start_id = keys.pop(0)
-            else:
-                start_id = si.END_MARKER
-            contents = []
-            while keys:
-                char = char_items[keys[0]]
-                if isinstance(char, int):
-                    handle_formatting_code(char)
-                elif char == "\n":
-                    # End of paragraph
-                    break
-                else:
-                    assert len(char) <= 1
-                    # Start a new string if text properties have changed
-                    if not contents or contents[-1].properties != properties:
-                        contents += [CrdtStr(properties=properties.copy())]
-                    contents[-1].s += char
-                    contents[-1].i += [keys[0]]
-                keys.pop(0)
-
-            return start_id, contents
+        def make_paragraph(start_id, runs):
+            # Each run's characters are only joined once it is complete
+            contents = [
+                CrdtStr("".join(chars), ids, dict(props)) for props, chars, ids in runs
+            ]
+            if start_id in text.styles:
+                return Paragraph(contents, start_id, text.styles[start_id])
+            return Paragraph(contents, start_id)
 
+        # Walk the characters once. Each newline starts a new paragraph,
+        # identified by the newline's id; any text before the first newline
+        # belongs to a paragraph identified by the end marker.
         paragraphs = []
-        while keys:
-            start_id, contents = parse_paragraph_contents()
-            if start_id in text.styles:
-                p = Paragraph(contents, start_id, text.styles[start_id])
+        start_id = None
+        runs: list[tuple[dict, list[str], list[CrdtId]]] = []
+        for key, char in char_items.items():
+            if char == "\n":
+                # End of paragraph
+                if start_id is not None:
+                    paragraphs += [make_paragraph(start_id, runs)]
+                start_id = key
+                runs = []
+                continue
+            if start_id is None:
+                start_id = si.END_MARKER
+            if isinstance(char, int):
+                handle_formatting_code(char)
             else:
-                p = Paragraph(contents, start_id)
-            paragraphs += [p]
+                assert len(char) <= 1
+                # Start a new run if text properties have changed
+                if not runs or runs[-1][0] is not properties:
+                    runs += [(properties, [], [])]
+                runs[-1][1].append(char)
+                runs[-1][2].append(key)
+        if start_id is not None:
+            paragraphs += [make_paragraph(start_id, runs)]
 
         doc = cls(paragraphs)
         return doc
@@ -0,0 +1,54 @@
+import difflib
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+
+from rmscene import read_blocks
+
+DATA_PATH = Path(__file__).parent / "data"
+
+
+@pytest.fixture(scope="session")
+def rm_data():
+    """Return the contents and parsed blocks of an example .rm file.
+
+    Each file is read and parsed at most once per session.
+    """
+    cache = {}
+
+    def get(name):
+        if name not in cache:
+            data = (DATA_PATH / name).read_bytes()
+            cache[name] = data, list(read_blocks(BytesIO(data)))
+        return cache[name]
+
+    return get
+
+
+def _hex_lines(b, n=32):
+    h = b.hex()
+    s = 2 * n
+    return [h[i : i + s] for i in range(0, len(h) + 1, s)]
+
+
+@pytest.fixture(scope="session")
+def assert_bytes_equal():
+    """Return a function asserting that written bytes match the expected bytes.
+
+    The bytes are compared directly, and only formatted as a diff of hex
+    lines when they differ.
+    """
+
+    def check(actual, expected):
+        if actual != expected:
+            diff = difflib.unified_diff(
+                _hex_lines(expected),
+                _hex_lines(actual),
+                "expected",
+                "actual",
+                lineterm="",
+            )
+            pytest.fail("Output differs:\n" + "\n".join(diff))
+
+    return check
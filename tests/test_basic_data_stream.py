@@ -1,6 +1,9 @@
+import dataclasses
+import pickle
 import pytest
 from io import BytesIO
 from rmscene.tagged_block_common import (
+    CrdtId,
     DataStream
 )
 
@@ -37,3 +40,29 @@ def test_write_varuint(value, hexstr):
     assert buf.getvalue().hex() == hexstr
     buf.seek(0)
     assert s.read_varuint() == value
+
+
+def test_crdt_id_equality_and_hash():
+    assert CrdtId(1, 2) == CrdtId(1, 2)
+    assert hash(CrdtId(1, 2)) == hash(CrdtId(1, 2))
+    assert CrdtId(1, 2) != CrdtId(2, 1)
+    assert CrdtId(0, 2**64 - 1) != CrdtId(1, 2**64 - 1)
+    # Out of range parts (e.g. from a corrupt file) are still compared by field
+    assert CrdtId(0, 2**64) != CrdtId(1, 0)
+    assert CrdtId(3, -1) != CrdtId(0, -1)
+    assert CrdtId(1, 2) != (1, 2)
+    assert {CrdtId(1, 2): "a"}[CrdtId(1, 2)] == "a"
+    assert sorted([CrdtId(2, 0), CrdtId(1, 5), CrdtId(1, 3)]) == [
+        CrdtId(1, 3),
+        CrdtId(1, 5),
+        CrdtId(2, 0),
+    ]
+
+
+def test_crdt_id_fields():
+    assert [f.name for f in dataclasses.fields(CrdtId)] == ["part1", "part2"]
+    assert dataclasses.astuple(CrdtId(1, 2)) == (1, 2)
+
+    crdt_id = CrdtId(1, 2)
+    hash(crdt_id)
+    assert pickle.loads(pickle.dumps(crdt_id)) == crdt_id
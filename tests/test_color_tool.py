@@ -13,10 +13,6 @@ logger = logging.getLogger(__name__)
 DATA_PATH = Path(__file__).parent / "data"
 
 
-def _hex_lines(b, n=32):
-    return [b[i * n : (i + 1) * n].hex() for i in range(len(b) // n + 1)]
-
-
 FILE_NAME = os.path.join(DATA_PATH, "Color_and_tool_v3.14.4.rm")
 
 
@@ -33,11 +29,11 @@ def test_color_tool_parsing(block_type, colors, tools):
     with open(FILE_NAME, "rb") as f:
         result = read_blocks(f)
         for el in result:
-            if not getattr(el, "item", None):
+            if not isinstance(el, block_type):
+                continue
+            value = el.item.value
+            if value is None or value.color not in colors:
                 continue
-            if not getattr(el.item, "value", None):
+            if tools is None:
                 continue
-            if isinstance(el, block_type) and el.item.value.color in colors:
-                if tools is None:
-                    continue
-                assert el.item.value.tool in tools, "Tool and colors don't match"
\ No newline at end of file
+            assert value.tool in tools, "Tool and colors don't match"
\ No newline at end of file
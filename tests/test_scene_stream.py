@@ -1,6 +1,5 @@
 import pytest
 from io import BytesIO
-from pathlib import Path
 from uuid import UUID
 from rmscene import (
     read_blocks,
@@ -20,11 +19,19 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-DATA_PATH = Path(__file__).parent / "data"
+# Author ids used in the expected and roundtrip blocks below
+_UUID_A = UUID("495ba59f-c943-2b5c-b455-3682f6948906")
+_UUID_B = UUID("cd83324a-917f-11ed-bb7b-3c0754484e34")
 
 
-def _hex_lines(b, n=32):
-    return [b[i * n : (i + 1) * n].hex() for i in range(len(b) // n + 1)]
+@pytest.fixture(scope="module")
+def io_pair():
+    """Buffer with a writer and reader on it, shared by the roundtrip tests.
+
+    Each test empties the buffer before use.
+    """
+    buf = BytesIO()
+    return buf, TaggedBlockWriter(buf), TaggedBlockReader(buf)
 
 
 LINES_V2_FILES = [
@@ -48,16 +55,20 @@ TEST_FILES_AND_VERSIONS = [
 ]
 
 
+# Line block header min version, as written by some versions (see below)
+_MIN_VER_OLD = bytes.fromhex("010205")
+_MIN_VER_NEW = bytes.fromhex("020205")
+
+
 @pytest.mark.parametrize("test_file,version", TEST_FILES_AND_VERSIONS)
-def test_full_roundtrip(test_file, version):
-    with open(DATA_PATH / test_file, "rb") as f:
-        data = f.read()
+def test_full_roundtrip(test_file, version, rm_data, assert_bytes_equal):
+    data, _ = rm_data(test_file)
 
     # XXX not sure why this is a problem -- reMarkable seems to be inconsistent
     # about the min version written to line block headers?
     if version in ("3.2.2", "3.3.2"):
         # This is not a very good way of doing it...
-        data = data.replace(bytes.fromhex("010205"), bytes.fromhex("020205"))
+        data = data.replace(_MIN_VER_OLD, _MIN_VER_NEW)
 
     input_buf = BytesIO(data)
     output_buf = BytesIO()
@@ -65,7 +76,7 @@ def test_full_roundtrip(test_file, version):
 
     write_blocks(output_buf, read_blocks(input_buf), options)
 
-    assert _hex_lines(input_buf.getvalue()) == _hex_lines(output_buf.getvalue())
+    assert_bytes_equal(output_buf.getvalue(), input_buf.getvalue())
 
 
 # FIXME: remove xfail when parsing updated
@@ -80,9 +91,8 @@ TEST_FILES_FOR_FULL_PARSING = [
 
 
 @pytest.mark.parametrize("test_file", TEST_FILES_FOR_FULL_PARSING)
-def test_files_fully_parsed(test_file):
-    with open(DATA_PATH / test_file, "rb") as f:
-        result = list(read_blocks(f))
+def test_files_fully_parsed(test_file, rm_data):
+    _, result = rm_data(test_file)
 
     # Check none of the blocks were unreadable and do not have extra data
     for block in result:
@@ -90,172 +100,187 @@ def test_files_fully_parsed(test_file):
         assert not block.extra_data
 
 
-def test_normal_ab():
-    with open(DATA_PATH / "Normal_AB.rm", "rb") as f:
-        result = list(read_blocks(f))
-
-    assert result == [
-        AuthorIdsBlock(author_uuids={1: UUID("495ba59f-c943-2b5c-b455-3682f6948906")}),
-        MigrationInfoBlock(migration_id=CrdtId(1, 1), is_device=True),
-        PageInfoBlock(
-            loads_count=1, merges_count=0, text_chars_count=3, text_lines_count=1
-        ),
-        SceneTreeBlock(
-            tree_id=CrdtId(0, 11),
-            node_id=CrdtId(0, 0),
-            is_update=True,
-            parent_id=CrdtId(0, 1),
-        ),
-        RootTextBlock(
-            block_id=CrdtId(0, 0),
-            value=si.Text(
-                items=CrdtSequence(
-                    [
-                        CrdtSequenceItem(
-                            item_id=CrdtId(1, 16),
-                            left_id=CrdtId(0, 0),
-                            right_id=CrdtId(0, 0),
-                            deleted_length=0,
-                            value="AB",
-                        )
-                    ]
-                ),
-                styles={
-                    CrdtId(0, 0): LwwValue(
-                        timestamp=CrdtId(1, 15), value=si.ParagraphStyle.PLAIN
-                    ),
-                },
-                pos_x=-468.0,
-                pos_y=234.0,
-                width=936.0,
+_EXPECTED_NORMAL_AB = [
+    AuthorIdsBlock(author_uuids={1: _UUID_A}),
+    MigrationInfoBlock(migration_id=CrdtId(1, 1), is_device=True),
+    PageInfoBlock(
+        loads_count=1, merges_count=0, text_chars_count=3, text_lines_count=1
+    ),
+    SceneTreeBlock(
+        tree_id=CrdtId(0, 11),
+        node_id=CrdtId(0, 0),
+        is_update=True,
+        parent_id=CrdtId(0, 1),
+    ),
+    RootTextBlock(
+        block_id=CrdtId(0, 0),
+        value=si.Text(
+            items=CrdtSequence(
+                [
+                    CrdtSequenceItem(
+                        item_id=CrdtId(1, 16),
+                        left_id=CrdtId(0, 0),
+                        right_id=CrdtId(0, 0),
+                        deleted_length=0,
+                        value="AB",
+                    )
+                ]
             ),
+            styles={
+                CrdtId(0, 0): LwwValue(
+                    timestamp=CrdtId(1, 15), value=si.ParagraphStyle.PLAIN
+                ),
+            },
+            pos_x=-468.0,
+            pos_y=234.0,
+            width=936.0,
         ),
-        TreeNodeBlock(
-            group=si.Group(node_id=CrdtId(0, 1)),
+    ),
+    TreeNodeBlock(
+        group=si.Group(node_id=CrdtId(0, 1)),
+    ),
+    TreeNodeBlock(
+        group=si.Group(
+            node_id=CrdtId(0, 11),
+            label=LwwValue(CrdtId(0, 12), "Layer 1"),
         ),
-        TreeNodeBlock(
-            group=si.Group(
-                node_id=CrdtId(0, 11),
-                label=LwwValue(CrdtId(0, 12), "Layer 1"),
-            ),
-        ),
-        SceneGroupItemBlock(
-            parent_id=CrdtId(0, 1),
-            item=CrdtSequenceItem(
-                item_id=CrdtId(0, 13),
-                left_id=CrdtId(0, 0),
-                right_id=CrdtId(0, 0),
-                deleted_length=0,
-                value=CrdtId(0, 11),
-            ),
+    ),
+    SceneGroupItemBlock(
+        parent_id=CrdtId(0, 1),
+        item=CrdtSequenceItem(
+            item_id=CrdtId(0, 13),
+            left_id=CrdtId(0, 0),
+            right_id=CrdtId(0, 0),
+            deleted_length=0,
+            value=CrdtId(0, 11),
         ),
-    ]
+    ),
+]
+
+
+def test_normal_ab(rm_data):
+    _, result = rm_data("Normal_AB.rm")
+
+    assert result == _EXPECTED_NORMAL_AB
 
 
-def test_read_glyph_range():
-    with open(DATA_PATH / "Wikipedia_highlighted_p1.rm", "rb") as f:
-        result = [
-            block for block in read_blocks(f) if isinstance(block, SceneGlyphItemBlock)
-        ]
+def test_read_glyph_range(rm_data):
+    _, blocks = rm_data("Wikipedia_highlighted_p1.rm")
+    result = [block for block in blocks if isinstance(block, SceneGlyphItemBlock)]
 
     assert result[0].item.value.text == "The reMarkable uses electronic paper"
 
 
-@pytest.mark.parametrize(
-    "block",
-    [
-        AuthorIdsBlock(author_uuids={1: UUID("495ba59f-c943-2b5c-b455-3682f6948906")}),
-        AuthorIdsBlock(
-            author_uuids={
-                1: UUID("495ba59f-c943-2b5c-b455-3682f6948906"),
-                2: UUID("cd83324a-917f-11ed-bb7b-3c0754484e34"),
-            }
-        ),
-        MigrationInfoBlock(migration_id=CrdtId(1, 1), is_device=True),
-        PageInfoBlock(
-            loads_count=3, merges_count=2, text_chars_count=3, text_lines_count=1
-        ),
-        SceneTreeBlock(
-            tree_id=CrdtId(0, 11),
-            node_id=CrdtId(0, 0),
-            is_update=True,
-            parent_id=CrdtId(0, 1),
-        ),
-        RootTextBlock(
-            block_id=CrdtId(0, 0),
-            value=si.Text(
-                items=CrdtSequence(
-                    [
-                        CrdtSequenceItem(
-                            item_id=CrdtId(1, 16),
-                            left_id=CrdtId(0, 0),
-                            right_id=CrdtId(0, 0),
-                            deleted_length=0,
-                            value="AB",
-                        )
-                    ]
-                ),
-                styles={
-                    CrdtId(0, 0): LwwValue(
-                        timestamp=CrdtId(1, 15), value=si.ParagraphStyle.PLAIN
-                    ),
-                },
-                pos_x=-468.0,
-                pos_y=234.0,
-                width=936.0,
+def test_read_v1_point_directions(rm_data):
+    _, blocks = rm_data("Normal_A_stroke_2_layers.rm")
+    result = [block for block in blocks if isinstance(block, SceneLineItemBlock)]
+
+    # Values as computed by `255 * x / (2 * pi)`, exactly
+    points = result[0].item.value.points
+    assert [p.direction for p in points[:5]] == [
+        0.0,
+        26.585988265620696,
+        217.64806918576915,
+        64.07277232392686,
+        151.0362394938696,
+    ]
+
+
+ROUNDTRIP_BLOCKS = [
+    AuthorIdsBlock(author_uuids={1: _UUID_A}),
+    AuthorIdsBlock(
+        author_uuids={
+            1: _UUID_A,
+            2: _UUID_B,
+        }
+    ),
+    MigrationInfoBlock(migration_id=CrdtId(1, 1), is_device=True),
+    PageInfoBlock(
+        loads_count=3, merges_count=2, text_chars_count=3, text_lines_count=1
+    ),
+    SceneTreeBlock(
+        tree_id=CrdtId(0, 11),
+        node_id=CrdtId(0, 0),
+        is_update=True,
+        parent_id=CrdtId(0, 1),
+    ),
+    RootTextBlock(
+        block_id=CrdtId(0, 0),
+        value=si.Text(
+            items=CrdtSequence(
+                [
+                    CrdtSequenceItem(
+                        item_id=CrdtId(1, 16),
+                        left_id=CrdtId(0, 0),
+                        right_id=CrdtId(0, 0),
+                        deleted_length=0,
+                        value="AB",
+                    )
+                ]
             ),
+            styles={
+                CrdtId(0, 0): LwwValue(
+                    timestamp=CrdtId(1, 15), value=si.ParagraphStyle.PLAIN
+                ),
+            },
+            pos_x=-468.0,
+            pos_y=234.0,
+            width=936.0,
         ),
-        TreeNodeBlock(
-            group=si.Group(
-                node_id=CrdtId(0, 11),
-                label=LwwValue(CrdtId(0, 12), "Layer 1"),
-            ),
+    ),
+    TreeNodeBlock(
+        group=si.Group(
+            node_id=CrdtId(0, 11),
+            label=LwwValue(CrdtId(0, 12), "Layer 1"),
         ),
-        SceneGroupItemBlock(
-            parent_id=CrdtId(0, 1),
-            item=CrdtSequenceItem(
-                item_id=CrdtId(0, 13),
-                left_id=CrdtId(0, 0),
-                right_id=CrdtId(0, 0),
-                deleted_length=0,
-                value=CrdtId(0, 11),
-            ),
+    ),
+    SceneGroupItemBlock(
+        parent_id=CrdtId(0, 1),
+        item=CrdtSequenceItem(
+            item_id=CrdtId(0, 13),
+            left_id=CrdtId(0, 0),
+            right_id=CrdtId(0, 0),
+            deleted_length=0,
+            value=CrdtId(0, 11),
         ),
-        SceneGlyphItemBlock(
-            parent_id=CrdtId(0, 11),
-            item=CrdtSequenceItem(
-                item_id=CrdtId(1, 17),
-                left_id=CrdtId(1, 16),
-                right_id=CrdtId(0, 0),
-                deleted_length=0,
-                value=si.GlyphRange(
-                    start=1536,
-                    length=23,
-                    text="display technology.[13]",
-                    color=si.PenColor.YELLOW,
-                    rectangles=[
-                        si.Rectangle(
-                            x=-809.061564750815,
-                            y=1724.1146737357485,
-                            w=333.5427440226558,
-                            h=56.30432956921868,
-                        ),
-                        si.Rectangle(
-                            x=-485.51105154941456,
-                            y=1730.4364894378523,
-                            w=58.22011730763188,
-                            h=33.42225280328421,
-                        ),
-                    ],
-                ),
+    ),
+    SceneGlyphItemBlock(
+        parent_id=CrdtId(0, 11),
+        item=CrdtSequenceItem(
+            item_id=CrdtId(1, 17),
+            left_id=CrdtId(1, 16),
+            right_id=CrdtId(0, 0),
+            deleted_length=0,
+            value=si.GlyphRange(
+                start=1536,
+                length=23,
+                text="display technology.[13]",
+                color=si.PenColor.YELLOW,
+                rectangles=[
+                    si.Rectangle(
+                        x=-809.061564750815,
+                        y=1724.1146737357485,
+                        w=333.5427440226558,
+                        h=56.30432956921868,
+                    ),
+                    si.Rectangle(
+                        x=-485.51105154941456,
+                        y=1730.4364894378523,
+                        w=58.22011730763188,
+                        h=33.42225280328421,
+                    ),
+                ],
             ),
         ),
-    ],
-)
-def test_blocks_roundtrip(block):
-    buf = BytesIO()
-    writer = TaggedBlockWriter(buf)
-    reader = TaggedBlockReader(buf)
+    ),
+]
+
+
+@pytest.mark.parametrize("block", ROUNDTRIP_BLOCKS, ids=lambda b: type(b).__name__)
+def test_blocks_roundtrip(io_pair, block):
+    buf, writer, reader = io_pair
+    buf.seek(0)
+    buf.truncate(0)
 
     block.write(writer)
     buf.seek(0)
@@ -267,6 +292,28 @@ def test_blocks_roundtrip(block):
     assert block2 == block
 
 
+def test_scene_item_from_stream_uses_block_type(io_pair):
+    buf, writer, reader = io_pair
+    buf.seek(0)
+    buf.truncate(0)
+    block = next(b for b in ROUNDTRIP_BLOCKS if isinstance(b, SceneGlyphItemBlock))
+    block.write(writer)
+    buf.seek(0)
+
+    # The block type decides the item type, whichever subclass is called
+    with reader.read_block():
+        block2 = SceneLineItemBlock.from_stream(reader)
+
+    assert block2 == block
+
+
+# Expected file header, spelled out so that changes to HEADER_V6 are caught
+_HDR = b"reMarkable .lines file, version=6          "
+
+# Expected encoding of the block written in test_write_blocks
+_MIGRATION_INFO_BLOCK_BYTES = bytes.fromhex("05000000000101001f01012101")
+
+
 def test_write_blocks():
     blocks = [
         MigrationInfoBlock(migration_id=CrdtId(1, 1), is_device=True),
@@ -275,15 +322,16 @@ def test_write_blocks():
     buf = BytesIO()
     write_blocks(buf, blocks, options={"version": "3.1"})
 
-    assert buf.getvalue()[:43] == b"reMarkable .lines file, version=6          "
-    assert buf.getvalue()[43:].hex() == "05000000000101001f01012101"
+    data = buf.getvalue()
+    assert data[:43] == _HDR
+    assert data[43:] == _MIGRATION_INFO_BLOCK_BYTES
 
 
-def test_blocks_keep_unknown_data_in_main_block():
-    # The "E1 FF" is represents new, unknown data -- note that this might need
-    # to be changed in future if the next id starts to actually be used in a
-    # future update!
-    data_hex = """
+# The "E1 FF" is represents new, unknown data -- note that this might need
+# to be changed in future if the next id starts to actually be used in a
+# future update!
+_UNKNOWN_MAIN_BLOCK_BYTES = HEADER_V6 + bytes.fromhex(
+    """
     21000000 0000010D
     1C 06000000
        1F 0000
@@ -294,17 +342,21 @@ def test_blocks_keep_unknown_data_in_main_block():
        1F 0000 21 01
     E1 FF
     """
-    buf = BytesIO(HEADER_V6 + bytes.fromhex(data_hex))
+)
+
+
+def test_blocks_keep_unknown_data_in_main_block():
+    buf = BytesIO(_UNKNOWN_MAIN_BLOCK_BYTES)
     block = next(read_blocks(buf))
     assert isinstance(block, SceneInfo)
     assert block.extra_data == bytes.fromhex("E1 FF")
 
 
-def test_blocks_keep_unknown_data_in_value_subblock():
-    # The "8f 010f" is represents new, unknown data -- note that this might need
-    # to be changed in future if the next id starts to actually be used in a
-    # future update!
-    data_hex = """
+# The "8f 010f" is represents new, unknown data -- note that this might need
+# to be changed in future if the next id starts to actually be used in a
+# future update!
+_UNKNOWN_VALUE_SUBBLOCK_BYTES = HEADER_V6 + bytes.fromhex(
+    """
     59000000 00020205
     1f 0219
     2f 021e
@@ -324,16 +376,20 @@ def test_blocks_keep_unknown_data_in_value_subblock():
        7f 010f
        8f 0101
     """
-    buf = BytesIO(HEADER_V6 + bytes.fromhex(data_hex))
+)
+
+
+def test_blocks_keep_unknown_data_in_value_subblock():
+    buf = BytesIO(_UNKNOWN_VALUE_SUBBLOCK_BYTES)
     block = next(read_blocks(buf))
     assert isinstance(block, SceneLineItemBlock)
     assert block.extra_value_data == bytes.fromhex("8f 0101")
 
 
-def test_error_in_block_contained():
-    # First block will cause a parsing error at `0xff`. Second block should
-    # still be parsed.
-    data_hex = """
+# First block will cause a parsing error at `0xff`. Second block should
+# still be parsed.
+_BAD_THEN_GOOD_BLOCK_BYTES = HEADER_V6 + bytes.fromhex(
+    """
     06000000 00010103
     1f 0219
     aa bbcc
@@ -341,7 +397,11 @@ def test_error_in_block_contained():
     1f 0219
     21 01
     """
-    buf = BytesIO(HEADER_V6 + bytes.fromhex(data_hex))
+)
+
+
+def test_error_in_block_contained():
+    buf = BytesIO(_BAD_THEN_GOOD_BLOCK_BYTES)
     blocks = list(read_blocks(buf))
     assert blocks == [
         UnreadableBlock(
@@ -367,15 +427,18 @@ def test_error_in_block_contained():
     assert buf2.getvalue() == buf.getvalue()
 
 
-from hypothesis import given, strategies as st
+from hypothesis import given, settings, strategies as st
 
 
-crdt_id_strategy = st.builds(
-    CrdtId,
-    st.integers(min_value=0, max_value=2**8 - 1),
-    st.integers(min_value=0, max_value=2**64 - 1),
-)
-st.register_type_strategy(CrdtId, crdt_id_strategy)
+@st.composite
+def crdt_id_strategy(draw):
+    return CrdtId(
+        draw(st.integers(min_value=0, max_value=2**8 - 1)),
+        draw(st.integers(min_value=0, max_value=2**64 - 1)),
+    )
+
+
+st.register_type_strategy(CrdtId, crdt_id_strategy())
 
 author_ids_block_strategy = st.builds(
     AuthorIdsBlock,
@@ -392,10 +455,11 @@ block_strategy = st.one_of(
 
 
 @given(block_strategy)
-def test_blocks_roundtrip_2(block):
-    buf = BytesIO()
-    writer = TaggedBlockWriter(buf)
-    reader = TaggedBlockReader(buf)
+@settings(derandomize=True, deadline=None, max_examples=25, database=None)
+def test_blocks_roundtrip_2(io_pair, block):
+    buf, writer, reader = io_pair
+    buf.seek(0)
+    buf.truncate(0)
 
     block.write(writer)
     buf.seek(0)
@@ -405,8 +469,10 @@ def test_blocks_roundtrip_2(block):
     assert block2 == block
 
 
-@given(...)
-def test_write_id(crdt_id: CrdtId):
-    buf = BytesIO()
-    s = TaggedBlockWriter(buf)
+@given(crdt_id=...)
+@settings(derandomize=True, deadline=None, max_examples=25, database=None)
+def test_write_id(io_pair, crdt_id: CrdtId):
+    buf, s, _ = io_pair
+    buf.seek(0)
+    buf.truncate(0)
     s.write_id(3, crdt_id)
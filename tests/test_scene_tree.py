@@ -47,54 +47,64 @@ DATA_PATH = Path(__file__).parent / "data"
 
 
 def tree_structure(item):
-    if isinstance(item, si.Group):
-        return (
-            item.node_id,
-            item.label.value,
-            [tree_structure(child) for child in item.children.values()],
-        )
-    else:
+    if not isinstance(item, si.Group):
         return item
+    # Walk with an explicit stack rather than recursing, so deep trees are fine
+    result = (item.node_id, item.label.value, [])
+    stack = [(item, result[2])]
+    while stack:
+        group, children = stack.pop()
+        for child in group.children.values():
+            if isinstance(child, si.Group):
+                entry = (child.node_id, child.label.value, [])
+                stack.append((child, entry[2]))
+                children.append(entry)
+            else:
+                children.append(child)
+    return result
 
 
-def test_basic_tree_structure():
-    # this is the bare minimum structure
-    blocks = [
-        SceneTreeBlock(
-            tree_id=CrdtId(0, 11),
-            node_id=CrdtId(0, 0),
-            is_update=True,
-            parent_id=CrdtId(0, 1),
-        ),
-        TreeNodeBlock(
-            si.Group(CrdtId(0, 1)),
-        ),
-        TreeNodeBlock(
-            si.Group(
-                node_id=CrdtId(0, 11),
-                label=LwwValue(CrdtId(0, 12), "Layer 1"),
-            )
-        ),
-        SceneGroupItemBlock(
-            parent_id=CrdtId(0, 1),
-            item=CrdtSequenceItem(
-                item_id=CrdtId(0, 13),
-                left_id=CrdtId(0, 0),
-                right_id=CrdtId(0, 0),
-                deleted_length=0,
-                value=CrdtId(0, 11),
-            ),
+# This is the bare minimum structure
+_BASIC_BLOCKS = [
+    SceneTreeBlock(
+        tree_id=CrdtId(0, 11),
+        node_id=CrdtId(0, 0),
+        is_update=True,
+        parent_id=CrdtId(0, 1),
+    ),
+    TreeNodeBlock(
+        si.Group(CrdtId(0, 1)),
+    ),
+    TreeNodeBlock(
+        si.Group(
+            node_id=CrdtId(0, 11),
+            label=LwwValue(CrdtId(0, 12), "Layer 1"),
+        )
+    ),
+    SceneGroupItemBlock(
+        parent_id=CrdtId(0, 1),
+        item=CrdtSequenceItem(
+            item_id=CrdtId(0, 13),
+            left_id=CrdtId(0, 0),
+            right_id=CrdtId(0, 0),
+            deleted_length=0,
+            value=CrdtId(0, 11),
         ),
-    ]
+    ),
+]
+
+_BASIC_EXPECTED = (
+    CrdtId(0, 1),
+    "",
+    [(CrdtId(0, 11), "Layer 1", [])],
+)
 
+
+def test_basic_tree_structure():
     tree = SceneTree()
-    build_tree(tree, blocks)
+    build_tree(tree, _BASIC_BLOCKS)
 
-    assert tree_structure(tree.root) == (
-        CrdtId(0, 1),
-        "",
-        [(CrdtId(0, 11), "Layer 1", [])],
-    )
+    assert tree_structure(tree.root) == _BASIC_EXPECTED
 
     assert list(tree.root.children.values()) == [
         si.Group(
@@ -172,188 +182,193 @@ def test_basic_tree_structure():
 # So the actual line data has a parent which is a layer. (0, 11) or (1, 30)
 
 
-def test_text_and_strokes():
-    line1 = si.Line(
-        color=si.PenColor.RED,
-        tool=si.Pen.PENCIL_2,
-        points=[],
-        thickness_scale=2.0,
-        starting_length=0.0,
-    )
-    line2 = si.Line(
-        color=si.PenColor.BLACK,
-        tool=si.Pen.FINELINER_2,
-        points=[],
-        thickness_scale=2.0,
-        starting_length=0.0,
-    )
-    blocks = [
-        SceneTreeBlock(
-            tree_id=CrdtId(0, 13),
-            node_id=CrdtId(0, 0),
-            is_update=True,
-            parent_id=CrdtId(0, 1),
-        ),
-        SceneTreeBlock(
-            tree_id=CrdtId(1, 17),
-            node_id=CrdtId(0, 0),
-            is_update=True,
-            parent_id=CrdtId(0, 1),
-        ),
-        SceneTreeBlock(
-            tree_id=CrdtId(1, 20),
-            node_id=CrdtId(0, 0),
-            is_update=True,
-            parent_id=CrdtId(0, 13),
-        ),
-        SceneTreeBlock(
-            tree_id=CrdtId(1, 26),
-            node_id=CrdtId(0, 0),
-            is_update=True,
-            parent_id=CrdtId(1, 17),
-        ),
-        RootTextBlock(
-            block_id=CrdtId(0, 0),
-            value=si.Text(
-                items=CrdtSequence([
-                    CrdtSequenceItem(
-                        item_id=CrdtId(1, 14),
-                        left_id=CrdtId(0, 0),
-                        right_id=CrdtId(0, 0),
-                        deleted_length=0,
-                        value="A",
-                    )
-                ]),
-                styles={},
-                pos_x=-468.0,
-                pos_y=234.0,
-                width=936.0,
-            )
-        ),
-        TreeNodeBlock(
-            si.Group(node_id=CrdtId(0, 1)),
-        ),
-        TreeNodeBlock(
-            si.Group(
-                node_id=CrdtId(0, 13),
-                label=LwwValue(timestamp=CrdtId(0, 15), value="Layer 1"),
-                visible=LwwValue(timestamp=CrdtId(0, 16), value=True),
-            )
-        ),
-        TreeNodeBlock(
-            si.Group(
-                node_id=CrdtId(1, 17),
-                label=LwwValue(timestamp=CrdtId(1, 18), value="Layer 2"),
-                visible=LwwValue(timestamp=CrdtId(0, 0), value=True),
-            )
-        ),
-        TreeNodeBlock(
-            si.Group(
-                node_id=CrdtId(1, 20),
-                label=LwwValue(timestamp=CrdtId(0, 0), value=""),
-                visible=LwwValue(timestamp=CrdtId(0, 0), value=True),
-                anchor_id=LwwValue(timestamp=CrdtId(1, 22), value=CrdtId(1, 14)),
-                anchor_type=LwwValue(timestamp=CrdtId(1, 23), value=2),
-                anchor_threshold=LwwValue(timestamp=CrdtId(1, 24), value=67.02755737304688),
-                anchor_origin_x=LwwValue(timestamp=CrdtId(1, 20), value=-464.0),
-            )
+_LINE1 = si.Line(
+    color=si.PenColor.RED,
+    tool=si.Pen.PENCIL_2,
+    points=[],
+    thickness_scale=2.0,
+    starting_length=0.0,
+)
+
+_LINE2 = si.Line(
+    color=si.PenColor.BLACK,
+    tool=si.Pen.FINELINER_2,
+    points=[],
+    thickness_scale=2.0,
+    starting_length=0.0,
+)
+
+_TEXT_AND_STROKES_BLOCKS = [
+    SceneTreeBlock(
+        tree_id=CrdtId(0, 13),
+        node_id=CrdtId(0, 0),
+        is_update=True,
+        parent_id=CrdtId(0, 1),
+    ),
+    SceneTreeBlock(
+        tree_id=CrdtId(1, 17),
+        node_id=CrdtId(0, 0),
+        is_update=True,
+        parent_id=CrdtId(0, 1),
+    ),
+    SceneTreeBlock(
+        tree_id=CrdtId(1, 20),
+        node_id=CrdtId(0, 0),
+        is_update=True,
+        parent_id=CrdtId(0, 13),
+    ),
+    SceneTreeBlock(
+        tree_id=CrdtId(1, 26),
+        node_id=CrdtId(0, 0),
+        is_update=True,
+        parent_id=CrdtId(1, 17),
+    ),
+    RootTextBlock(
+        block_id=CrdtId(0, 0),
+        value=si.Text(
+            items=CrdtSequence([
+                CrdtSequenceItem(
+                    item_id=CrdtId(1, 14),
+                    left_id=CrdtId(0, 0),
+                    right_id=CrdtId(0, 0),
+                    deleted_length=0,
+                    value="A",
+                )
+            ]),
+            styles={},
+            pos_x=-468.0,
+            pos_y=234.0,
+            width=936.0,
+        )
+    ),
+    TreeNodeBlock(
+        si.Group(node_id=CrdtId(0, 1)),
+    ),
+    TreeNodeBlock(
+        si.Group(
+            node_id=CrdtId(0, 13),
+            label=LwwValue(timestamp=CrdtId(0, 15), value="Layer 1"),
+            visible=LwwValue(timestamp=CrdtId(0, 16), value=True),
+        )
+    ),
+    TreeNodeBlock(
+        si.Group(
+            node_id=CrdtId(1, 17),
+            label=LwwValue(timestamp=CrdtId(1, 18), value="Layer 2"),
+            visible=LwwValue(timestamp=CrdtId(0, 0), value=True),
+        )
+    ),
+    TreeNodeBlock(
+        si.Group(
+            node_id=CrdtId(1, 20),
+            label=LwwValue(timestamp=CrdtId(0, 0), value=""),
+            visible=LwwValue(timestamp=CrdtId(0, 0), value=True),
+            anchor_id=LwwValue(timestamp=CrdtId(1, 22), value=CrdtId(1, 14)),
+            anchor_type=LwwValue(timestamp=CrdtId(1, 23), value=2),
+            anchor_threshold=LwwValue(timestamp=CrdtId(1, 24), value=67.02755737304688),
+            anchor_origin_x=LwwValue(timestamp=CrdtId(1, 20), value=-464.0),
+        )
+    ),
+    TreeNodeBlock(
+        si.Group(
+            node_id=CrdtId(1, 26),
+            label=LwwValue(timestamp=CrdtId(0, 0), value=""),
+            visible=LwwValue(timestamp=CrdtId(0, 0), value=True),
+            anchor_id=LwwValue(timestamp=CrdtId(1, 28), value=CrdtId(1, 14)),
+            anchor_type=LwwValue(timestamp=CrdtId(1, 29), value=2),
+            anchor_threshold=LwwValue(timestamp=CrdtId(1, 30), value=67.02755737304688),
+            anchor_origin_x=LwwValue(timestamp=CrdtId(1, 26), value=-464.0),
+        )
+    ),
+    SceneGroupItemBlock(
+        parent_id=CrdtId(0, 1),
+        item=CrdtSequenceItem(
+            item_id=CrdtId(0, 14),
+            left_id=CrdtId(0, 0),
+            right_id=CrdtId(0, 0),
+            deleted_length=0,
+            value=CrdtId(0, 13),
         ),
-        TreeNodeBlock(
-            si.Group(
-                node_id=CrdtId(1, 26),
-                label=LwwValue(timestamp=CrdtId(0, 0), value=""),
-                visible=LwwValue(timestamp=CrdtId(0, 0), value=True),
-                anchor_id=LwwValue(timestamp=CrdtId(1, 28), value=CrdtId(1, 14)),
-                anchor_type=LwwValue(timestamp=CrdtId(1, 29), value=2),
-                anchor_threshold=LwwValue(timestamp=CrdtId(1, 30), value=67.02755737304688),
-                anchor_origin_x=LwwValue(timestamp=CrdtId(1, 26), value=-464.0),
-            )
+    ),
+    SceneGroupItemBlock(
+        parent_id=CrdtId(0, 1),
+        item=CrdtSequenceItem(
+            item_id=CrdtId(1, 19),
+            left_id=CrdtId(0, 14),
+            right_id=CrdtId(0, 0),
+            deleted_length=0,
+            value=CrdtId(1, 17),
         ),
-        SceneGroupItemBlock(
-            parent_id=CrdtId(0, 1),
-            item=CrdtSequenceItem(
-                item_id=CrdtId(0, 14),
-                left_id=CrdtId(0, 0),
-                right_id=CrdtId(0, 0),
-                deleted_length=0,
-                value=CrdtId(0, 13),
-            ),
+    ),
+    SceneGroupItemBlock(
+        parent_id=CrdtId(0, 13),
+        item=CrdtSequenceItem(
+            item_id=CrdtId(1, 21),
+            left_id=CrdtId(0, 0),
+            right_id=CrdtId(0, 0),
+            deleted_length=0,
+            value=CrdtId(1, 20),
         ),
-        SceneGroupItemBlock(
-            parent_id=CrdtId(0, 1),
-            item=CrdtSequenceItem(
-                item_id=CrdtId(1, 19),
-                left_id=CrdtId(0, 14),
-                right_id=CrdtId(0, 0),
-                deleted_length=0,
-                value=CrdtId(1, 17),
-            ),
+    ),
+    SceneGroupItemBlock(
+        parent_id=CrdtId(1, 17),
+        item=CrdtSequenceItem(
+            item_id=CrdtId(1, 27),
+            left_id=CrdtId(0, 0),
+            right_id=CrdtId(0, 0),
+            deleted_length=0,
+            value=CrdtId(1, 26),
         ),
-        SceneGroupItemBlock(
-            parent_id=CrdtId(0, 13),
-            item=CrdtSequenceItem(
-                item_id=CrdtId(1, 21),
-                left_id=CrdtId(0, 0),
-                right_id=CrdtId(0, 0),
-                deleted_length=0,
-                value=CrdtId(1, 20),
-            ),
+    ),
+    SceneLineItemBlock(
+        parent_id=CrdtId(1, 20),
+        item=CrdtSequenceItem(
+            item_id=CrdtId(1, 25),
+            left_id=CrdtId(0, 0),
+            right_id=CrdtId(0, 0),
+            deleted_length=0,
+            value=_LINE1,
         ),
-        SceneGroupItemBlock(
-            parent_id=CrdtId(1, 17),
-            item=CrdtSequenceItem(
-                item_id=CrdtId(1, 27),
-                left_id=CrdtId(0, 0),
-                right_id=CrdtId(0, 0),
-                deleted_length=0,
-                value=CrdtId(1, 26),
-            ),
+    ),
+    SceneLineItemBlock(
+        parent_id=CrdtId(1, 26),
+        item=CrdtSequenceItem(
+            item_id=CrdtId(1, 31),
+            left_id=CrdtId(0, 0),
+            right_id=CrdtId(0, 0),
+            deleted_length=0,
+            value=_LINE2,
         ),
-        SceneLineItemBlock(
-            parent_id=CrdtId(1, 20),
-            item=CrdtSequenceItem(
-                item_id=CrdtId(1, 25),
-                left_id=CrdtId(0, 0),
-                right_id=CrdtId(0, 0),
-                deleted_length=0,
-                value=line1,
-            ),
+    ),
+]
+
+_TEXT_AND_STROKES_EXPECTED = (
+    CrdtId(0, 1),
+    "",
+    [
+        (
+            CrdtId(0, 13),
+            "Layer 1",
+            [
+                (CrdtId(1, 20), "", [_LINE1]),
+            ],
         ),
-        SceneLineItemBlock(
-            parent_id=CrdtId(1, 26),
-            item=CrdtSequenceItem(
-                item_id=CrdtId(1, 31),
-                left_id=CrdtId(0, 0),
-                right_id=CrdtId(0, 0),
-                deleted_length=0,
-                value=line2,
-            ),
+        (
+            CrdtId(1, 17),
+            "Layer 2",
+            [
+                (CrdtId(1, 26), "", [_LINE2]),
+            ],
         ),
-    ]
+    ],
+)
 
+
+def test_text_and_strokes():
     tree = SceneTree()
-    build_tree(tree, blocks)
+    build_tree(tree, _TEXT_AND_STROKES_BLOCKS)
 
-    assert tree_structure(tree.root) == (
-        CrdtId(0, 1),
-        "",
-        [
-            (
-                CrdtId(0, 13),
-                "Layer 1",
-                [
-                    (CrdtId(1, 20), "", [line1]),
-                ],
-            ),
-            (
-                CrdtId(1, 17),
-                "Layer 2",
-                [
-                    (CrdtId(1, 26), "", [line2]),
-                ],
-            ),
-        ],
-    )
+    assert tree_structure(tree.root) == _TEXT_AND_STROKES_EXPECTED
 
     # TODO should also include the text items, and anchor reference
     #
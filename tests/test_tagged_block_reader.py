@@ -63,6 +63,13 @@ class TestBlock:
                 with s.read_block():
                     pass
 
+    def test_not_in_block_after_error(self):
+        s = stream(self.TEST_DATA)
+        with pytest.raises(ValueError):
+            with s.read_block():
+                raise ValueError
+        assert s.current_block is None
+
 
 class TestSubblock:
     TEST_DATA = (
@@ -131,19 +138,22 @@ def test_has_subblock_returns_False_at_end_of_file():
     assert s.has_subblock(2) == False
 
 
-def test_has_subblock_checks_for_end_of_block():
-    # See https://github.com/ricklupton/rmscene/issues/17#issuecomment-1701071477
-    #
-    # Construct some potentially confusing data -- the 0x2c is the start of the
-    # next block, but if we don't take care, `has_subblock(2)` could see it as a
-    # subblock instead.
-    data_hex = """
+# See https://github.com/ricklupton/rmscene/issues/17#issuecomment-1701071477
+#
+# Construct some potentially confusing data -- the 0x2c is the start of the
+# next block, but if we don't take care, `has_subblock(2)` could see it as a
+# subblock instead.
+_SUBBLOCK_LIKE_NEXT_BLOCK = bytes.fromhex(
+    """
     03000000 00010103
     1f 0219
     2c000000 00010100
     """
+)
 
-    s = stream(data_hex)
+
+def test_has_subblock_checks_for_end_of_block():
+    s = TaggedBlockReader(BytesIO(_SUBBLOCK_LIKE_NEXT_BLOCK))
     with s.read_block():
         assert s.read_id(1)
         assert s.has_subblock(2) == False
@@ -184,3 +194,8 @@ def test_read_string_utf():
     s = stream("1c05000000" "030161c397")
     result = s.read_string(1)
     assert result == "a×"
+
+
+def test_read_from_bytearray_is_rejected():
+    with pytest.raises(TypeError):
+        TaggedBlockReader(bytearray.fromhex("34abcd0000"))
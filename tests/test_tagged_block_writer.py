@@ -31,6 +31,15 @@ def test_write_block():
     assert buf.getvalue().hex() == "05000000000102053434120000"
 
 
+def test_write_block_to_bytearray():
+    buf = bytearray()
+    s = TaggedBlockWriter(buf)
+    with s.write_block(5, 1, 2):
+        with s.write_subblock(2):
+            s.write_int(3, 0x1234)
+    assert buf.hex() == "0a000000000102052c050000003434120000"
+
+
 def test_write_block_error_if_nested():
     buf = BytesIO()
     s = TaggedBlockWriter(buf)
@@ -55,6 +64,21 @@ def test_write_block_error_recovery():
     assert buf.getvalue().hex() == "7101"
 
 
+def test_write_block_after_error():
+    buf = BytesIO()
+    s = TaggedBlockWriter(buf)
+    try:
+        with s.write_block(5, 1, 2):
+            raise Exception
+    except:
+        pass
+
+    # Should no longer be considered to be in a block
+    with s.write_block(5, 1, 2):
+        s.write_int(3, 0x1234)
+    assert buf.getvalue().hex() == "05000000000102053434120000"
+
+
 def test_write_subblock():
     buf = BytesIO()
     s = TaggedBlockWriter(buf)
@@ -72,6 +96,34 @@ def test_write_subblock_nested():
     assert buf.getvalue().hex() == "1c0a0000002c050000003434120000"
 
 
+def test_write_subblock_nested_in_block():
+    buf = BytesIO()
+    s = TaggedBlockWriter(buf)
+    with s.write_block(5, 1, 2):
+        with s.write_subblock(1):
+            with s.write_subblock(2):
+                s.write_int(3, 0x1234)
+    assert buf.getvalue().hex() == (
+        "0f000000" "00010205" "1c0a0000002c050000003434120000"
+    )
+
+
+def test_write_subblock_in_block_error_recovery():
+    buf = BytesIO()
+    s = TaggedBlockWriter(buf)
+    with s.write_block(5, 1, 2):
+        try:
+            with s.write_subblock(2):
+                s.write_int(3, 0x1234)
+                raise Exception
+        except:
+            pass
+        s.write_bool(7, True)
+
+    # The partial subblock should have been discarded
+    assert buf.getvalue().hex() == "02000000000102057101"
+
+
 def test_write_subblock_error_recovery():
     buf = BytesIO()
     s = TaggedBlockWriter(buf)
@@ -107,13 +159,15 @@ def test_write_subblock_error_recovery():
         ("string", "a×"),
     ],
 )
-@pytest.mark.parametrize("index", [0, 3, 20])
-def test_values_roundtrip(data_type, value, index):
+def test_values_roundtrip(data_type, value):
     buf = BytesIO()
     writer = TaggedBlockWriter(buf)
     reader = TaggedBlockReader(buf)
     write = getattr(writer, f"write_{data_type}")
     read = getattr(reader, f"read_{data_type}")
-    write(index, value)
-    buf.seek(0)
-    assert read(index) == value
+    for index in (0, 3, 20):
+        buf.seek(0)
+        buf.truncate()
+        write(index, value)
+        buf.seek(0)
+        assert read(index) == value, f"index={index}"
@@ -1,4 +1,5 @@
 import pytest
+from functools import lru_cache
 from rmscene.text import (
     expand_text_item,
     expand_text_items,
@@ -10,6 +11,7 @@ from rmscene import scene_items as si
 from rmscene import CrdtId, CrdtSequenceItem, CrdtSequence
 
 
+@lru_cache(maxsize=None)
 def cid(k):
     "Shorthand for making end-markers or IDs with author-id = 1."
     return CrdtId(0 if k == 0 else 1, k)
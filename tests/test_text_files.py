@@ -1,23 +1,17 @@
+import copy
+import pickle
 from uuid import UUID
-from io import BytesIO
-from pathlib import Path
 from rmscene.scene_stream import *
 from rmscene.scene_items import Text, ParagraphStyle
 from rmscene.text import TextDocument, CrdtStr
 
-DATA_PATH = Path(__file__).parent / "data"
 
-
-def _hex_lines(b, n=32):
-    return [b[i * n : (i + 1) * n].hex() for i in range(len(b) // n + 1)]
-
-
-def extract_doc(filename):
-    with open(filename, "rb") as f:
-        tree = read_tree(f)
-        assert tree.root_text
-        doc = TextDocument.from_scene_item(tree.root_text)
-        return doc
+def extract_doc(blocks):
+    tree = SceneTree()
+    build_tree(tree, blocks)
+    assert tree.root_text
+    doc = TextDocument.from_scene_item(tree.root_text)
+    return doc
 
 
 def show_str_formatting(x):
@@ -33,7 +27,7 @@ def show_str_formatting(x):
 
 def formatted_lines(doc):
     return [
-        (p.style.value, "".join(show_str_formatting(s) for s in p.contents))
+        (p.style.value, "".join([show_str_formatting(s) for s in p.contents]))
         for p in doc.contents
     ]
 
@@ -44,13 +38,15 @@ def extract_paragraphs(filename):
         assert tree.root_text
 
 
-def test_normal_ab():
-    lines = formatted_lines(extract_doc(DATA_PATH / "Normal_AB.rm"))
+def test_normal_ab(rm_data):
+    _, blocks = rm_data("Normal_AB.rm")
+    lines = formatted_lines(extract_doc(blocks))
     assert lines == [(ParagraphStyle.PLAIN, "AB")]
 
 
-def test_list():
-    lines = formatted_lines(extract_doc(DATA_PATH / "Bold_Heading_Bullet_Normal.rm"))
+def test_list(rm_data):
+    _, blocks = rm_data("Bold_Heading_Bullet_Normal.rm")
+    lines = formatted_lines(extract_doc(blocks))
     assert lines == [
         (ParagraphStyle.BOLD, "A"),
         (ParagraphStyle.HEADING, "new line"),
@@ -59,8 +55,9 @@ def test_list():
     ]
 
 
-def test_inline_formats():
-    doc = extract_doc(DATA_PATH / "Normal_A_stroke_2_layers_v3.3.2.rm")
+def test_inline_formats(rm_data):
+    _, blocks = rm_data("Normal_A_stroke_2_layers_v3.3.2.rm")
+    doc = extract_doc(blocks)
     lines = formatted_lines(doc)
     assert lines == [
         (ParagraphStyle.PLAIN, "A"),
@@ -79,15 +76,21 @@ def test_inline_formats():
     ]
 
 
-def test_simple_text_document():
-    test_file = "Normal_AB.rm"
-    with open(DATA_PATH / test_file, "rb") as f:
-        expected = f.read()
+def test_copy_and_pickle_doc(rm_data):
+    _, blocks = rm_data("Normal_A_stroke_2_layers_v3.3.2.rm")
+    doc = extract_doc(blocks)
+
+    assert formatted_lines(copy.deepcopy(doc)) == formatted_lines(doc)
+    assert formatted_lines(pickle.loads(pickle.dumps(doc))) == formatted_lines(doc)
+
+
+def test_simple_text_document(rm_data, assert_bytes_equal):
+    expected, _ = rm_data("Normal_AB.rm")
 
-    output_buf = BytesIO()
+    output = bytearray()
     author_id = UUID("495ba59f-c943-2b5c-b455-3682f6948906")
     write_blocks(
-        output_buf, simple_text_document("AB", author_id), options={"version": "3.0"}
+        output, simple_text_document("AB", author_id), options={"version": "3.0"}
     )
 
-    assert _hex_lines(output_buf.getvalue()) == _hex_lines(expected)
+    assert_bytes_equal(output, expected)